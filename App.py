@@ -1,10 +1,11 @@
-import os
+import os, asyncio
 import streamlit as st
 import pandas as pd
 from openai import OpenAI
-from Config import client
+from Config import client, run_async
 
-from Utils.Privacy import redact
+from Utils.Privacy import redact, redact_many
+from Utils.Cache import async_ttl_cache
 
 # ---- Caching loaders ----
 @st.cache_resource
@@ -27,6 +28,18 @@ def lazy_index():
     except Exception:
         return None
 
+@st.cache_resource
+def load_embedder(name: str = "all-MiniLM-L6-v2"):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(name)
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def embed_query(name: str, query: str):
+    # repeated questions skip the forward pass
+    import numpy as np
+    qv = load_embedder(name).encode([query], normalize_embeddings=True)
+    return np.asarray(qv, dtype=np.float32)  # shape (1, d)
+
 # Sidebar toggle
 with st.sidebar:
     st.header("Privacy")
@@ -45,6 +58,13 @@ def apply_privacy(label: str, text: str) -> str:
         st.caption(f"🔒 {label}: redacted for privacy.")
     return red
 
+def apply_privacy_many(label: str, texts: list[str]) -> list[str]:
+    """Like apply_privacy, but one redaction pass and one note for the whole batch."""
+    red = redact_many(texts) if PRIVACY_ON else texts
+    if red != texts:
+        st.caption(f"🔒 {label}: redacted for privacy.")
+    return red
+
 def get_openai_client():
     # Try Streamlit secrets first, then environment
     api_key = st.secrets.get("OPENAI_API_KEY", os.getenv("OPENAI_API_KEY"))
@@ -54,8 +74,8 @@ def get_openai_client():
         )
     return OpenAI(api_key=api_key)
 
-def chat_completion(messages, model="gpt-4o-mini", temperature=0.7, max_tokens=400):
-    resp = client.chat.completions.create(
+async def achat_completion(messages, model="gpt-4o-mini", temperature=0.7, max_tokens=400):
+    resp = await client.chat.completions.create(
         model=model,
         temperature=temperature,
         max_tokens=max_tokens,
@@ -63,6 +83,23 @@ def chat_completion(messages, model="gpt-4o-mini", temperature=0.7, max_tokens=4
     )
     return resp.choices[0].message.content
 
+@async_ttl_cache()
+async def acached_chat(model, temperature, max_tokens, system, user):
+    """achat_completion for a system+user prompt, memoized so re-clicks skip the round-trip."""
+    msgs = [{"role": "system", "content": system},
+            {"role": "user", "content": user}]
+    return await achat_completion(msgs, model=model, temperature=temperature, max_tokens=max_tokens)
+
+async def achat_completions(model, temperature, max_tokens, system, users, max_concurrency=4):
+    """Run several user prompts concurrently, capped at max_concurrency in flight."""
+    sem = asyncio.Semaphore(max_concurrency)
+
+    async def one(user):
+        async with sem:
+            return await acached_chat(model, temperature, max_tokens, system, user)
+
+    return await asyncio.gather(*(one(u) for u in users))
+
 
 
 st.set_page_config(page_title="Banking Copilot – MVP", layout="wide")
@@ -103,11 +140,9 @@ with tabs[0]:
         if st.button("Generate with ChatGPT", key="openai_free"):
             try:
                 safe_user = apply_privacy("Prompt", user_prompt)
-                msgs = [{"role": "system", "content": system_prompt},
-                        {"role": "user", "content": safe_user}]
-                out = chat_completion(
-                    msgs, model=model_name, temperature=temperature, max_tokens=max_tokens
-                )
+                out = run_async(acached_chat(
+                    model_name, temperature, max_tokens, system_prompt, safe_user
+                ))
                 st.write(out)
             except Exception as e:
                 st.error(f"OpenAI call failed: {e}")
@@ -119,22 +154,24 @@ with tabs[0]:
             "Paste text to transform",
             value="The bank improved its CET1 ratio and reduced risk-weighted assets."
         )
-        style = st.selectbox("Style", ["Executive bullets", "Explain like I'm five", "Risks only"])
-        if st.button("Apply Template with ChatGPT", key="openai_templ"):
+        templates = {
+            "Executive bullets": "Summarize this in exactly 3 concise executive bullet points:\n\n{text}",
+            "Explain like I'm five": "Explain this simply, like I'm five. Avoid jargon:\n\n{text}",
+            "Risks only": "List only the risks mentioned in the following text. Do not add anything not present:\n\n{text}",
+        }
+        styles = st.multiselect("Styles", list(templates), default=["Executive bullets"],
+                                help="Pick several styles to run them side by side.")
+        if st.button("Apply Template with ChatGPT", key="openai_templ", disabled=not styles):
             try:
-                if style == "Executive bullets":
-                    prompt = f"Summarize this in exactly 3 concise executive bullet points:\n\n{base_text}"
-                elif style == "Explain like I'm five":
-                    prompt = f"Explain this simply, like I'm five. Avoid jargon:\n\n{base_text}"
-                else:
-                    prompt = f"List only the risks mentioned in the following text. Do not add anything not present:\n\n{base_text}"
-                safe_prompt = apply_privacy("Prompt", prompt)
-                msgs = [{"role": "system", "content": system_prompt},
-                        {"role": "user", "content": safe_prompt}]
-                out = chat_completion(
-                    msgs, model=model_name, temperature=temperature, max_tokens=max_tokens
-                )
-                st.write(out)
+                safe_text = apply_privacy("Prompt", base_text)
+                prompts = [templates[s].format(text=safe_text) for s in styles]
+                outs = run_async(achat_completions(
+                    model_name, temperature, max_tokens, system_prompt, prompts
+                ))
+                for style, out in zip(styles, outs):
+                    if len(styles) > 1:
+                        st.markdown(f"**{style}**")
+                    st.write(out)
             except Exception as e:
                 st.error(f"OpenAI call failed: {e}")
 
@@ -157,6 +194,8 @@ with tabs[1]:
         idx = lazy_index()
         if idx is None:
             st.warning("No index found yet. Add PDFs and click 'Build / Refresh Index'.")
+        else:
+            load_embedder(idx["model_name"])
 
         # NEW: relevance threshold control
         min_score = st.slider(
@@ -170,15 +209,17 @@ with tabs[1]:
         if st.button("Search", disabled=(lazy_index() is None)):
             from Rag.Retriever import cosine_topk
             q_safe = apply_privacy("Question", q)
-            results = cosine_topk(q_safe, lazy_index(), k=3, min_score=min_score)
+            idx = lazy_index()
+            qv = embed_query(idx["model_name"], q_safe)
+            results = cosine_topk(qv, idx, k=3, min_score=min_score)
 
             if not results:
                 st.info("🙅 No sufficiently relevant information found in the documents (above the threshold). "
                         "Try rephrasing your question or lowering the relevance threshold.")
             else:
                 st.write("**Top results (with citations):**")
-                for r in results:
-                    shown_text = apply_privacy("Context", r["text"])
+                shown = apply_privacy_many("Context", [r["text"] for r in results])
+                for r, shown_text in zip(results, shown):
                     st.markdown(f"> {shown_text}\n\n— *{r['source']}*, page {r['page']}  (score: {r['score']:.3f})")
 
                 top = results[0]
@@ -187,12 +228,21 @@ with tabs[1]:
 # ---------- TAB 3: Sentiment ----------
 with tabs[2]:
     st.header("Finance Sentiment (FinBERT)")
-    text = st.text_area("Paste news/headline", value="Inflation hits a new high, hurting markets.")
+    text = st.text_area("Paste news/headline", value="Inflation hits a new high, hurting markets.",
+                        help="Paste several headlines, one per line, to classify them in one batch.")
     if st.button("Classify sentiment"):
         nlp = load_finbert()
-        from Sentiment.Zero_shot import classify_sentiment
-        label, score = classify_sentiment(nlp, text)
-        st.write(f"**Label:** {label} — **Confidence:** {score:.3f}")
+        from Sentiment.Zero_shot import classify_sentiment, classify_sentiments
+        lines = [l.strip() for l in text.splitlines() if l.strip()]
+        if len(lines) > 1:
+            preds = classify_sentiments(nlp, lines)
+            st.dataframe(pd.DataFrame(
+                [(l, label, round(score, 3)) for l, (label, score) in zip(lines, preds)],
+                columns=["Headline", "Label", "Confidence"],
+            ))
+        else:
+            label, score = classify_sentiment(nlp, text)
+            st.write(f"**Label:** {label} — **Confidence:** {score:.3f}")
 
 
 # ---------- TAB 4: NL→SQL (Level B) ----------
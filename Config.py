@@ -0,0 +1,32 @@
+import os, asyncio, threading, atexit
+import httpx
+from openai import AsyncOpenAI
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+
+# One pooled HTTP/2 client: TLS handshakes are paid once and concurrent
+# requests multiplex over the same connection.
+_http = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+    timeout=60,
+)
+
+client = AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=_http)
+
+# One long-lived event loop for all OpenAI calls. Streamlit reruns the script
+# from a plain thread, and the async client's connection pool is tied to the
+# loop it first ran on, so a fresh asyncio.run() per rerun would break it.
+_loop = asyncio.new_event_loop()
+threading.Thread(target=_loop.run_forever, name="openai-loop", daemon=True).start()
+
+def run_async(coro):
+    """Run a coroutine on the shared loop and block until it finishes."""
+    return asyncio.run_coroutine_threadsafe(coro, _loop).result()
+
+@atexit.register
+def _close_http():
+    try:
+        asyncio.run_coroutine_threadsafe(_http.aclose(), _loop).result(timeout=5)
+    except Exception:
+        pass  # shutting down anyway
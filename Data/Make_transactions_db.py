@@ -1,6 +1,6 @@
-#Run once python data/make_transactions_db.py
+#Run once python data/make_transactions_db.py [n_rows]
 
-import os, sqlite3
+import os, sys, sqlite3
 import random, datetime
 
 # Where the database will live
@@ -11,19 +11,20 @@ counterparties = ["Acme Corp", "Beta Bank", "Gamma LLC", "Delta Ltd", "Omega Par
 currencies = ["USD", "EUR", "GBP", "JPY"]
 books = ["Loans", "FX Desk", "Derivatives", "Equities"]
 
-rows = []
-id_counter = 1
+DEFAULT_ROWS = 50
+N_DAYS = 10  # every seed spans the same 10 trading days, however many rows
 base_date = datetime.datetime(2025, 9, 1, 9, 0, 0)
 
-for day in range(10):  # 10 days of trades
-    for _ in range(5):  # 5 trades per day
+def gen_rows(n_rows: int):
+    """Yield rows one at a time so memory stays flat for large seeds."""
+    for id_counter in range(1, n_rows + 1):
+        day = (id_counter - 1) * N_DAYS // n_rows
         ts = base_date + datetime.timedelta(days=day, hours=random.randint(0,8), minutes=random.randint(0,59))
         amount = random.randint(50_000, 10_000_000)
         ccy = random.choice(currencies)
         cp = random.choice(counterparties)
         book = random.choice(books)
-        rows.append((id_counter, ts.strftime("%Y-%m-%d %H:%M:%S"), amount, ccy, cp, book))
-        id_counter += 1
+        yield (id_counter, ts.strftime("%Y-%m-%d %H:%M:%S"), amount, ccy, cp, book)
 
 
 schema_sql = """
@@ -35,20 +36,27 @@ CREATE TABLE IF NOT EXISTS transactions (
   counterparty TEXT,
   book TEXT
 );
+CREATE INDEX IF NOT EXISTS idx_ccy ON transactions(ccy);
+CREATE INDEX IF NOT EXISTS idx_cp ON transactions(counterparty);
+CREATE INDEX IF NOT EXISTS idx_ts ON transactions(ts);
 """
 
-def main():
+def main(n_rows: int = DEFAULT_ROWS):
     con = sqlite3.connect(DB_PATH)
+    con.execute("PRAGMA journal_mode=WAL")  # persistent; lets readers run during a reseed
+    con.execute("PRAGMA synchronous=NORMAL")  # safe with WAL, far fewer fsyncs
     cur = con.cursor()
     cur.executescript(schema_sql)
+    # One explicit transaction for the reset and every insert
+    cur.execute("BEGIN")
     cur.execute("DELETE FROM transactions;")  # reset for idempotent runs
     cur.executemany(
         "INSERT INTO transactions (id, ts, amount, ccy, counterparty, book) VALUES (?, ?, ?, ?, ?, ?)",
-        rows,
+        gen_rows(n_rows),
     )
     con.commit()
     con.close()
-    print(f"Seeded {DB_PATH} with {len(rows)} rows.")
+    print(f"Seeded {DB_PATH} with {n_rows} rows.")
 
 if __name__ == "__main__":
-    main()
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS)
@@ -1,13 +1,17 @@
 from __future__ import annotations
-import re, sqlite3, os
+import re, sqlite3, os, functools
+from pathlib import Path
 import pandas as pd
+import sqlglot
+from sqlglot import exp
 from typing import Tuple, Optional
 
 # We assume you created a global OpenAI client in config.py
 # config.py contains:
-#   from openai import OpenAI
-#   client = OpenAI(api_key=OPENAI_API_KEY)
-from Config import client
+#   from openai import AsyncOpenAI
+#   client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+from Config import client, run_async
+from Utils.Cache import async_ttl_cache
 
 ALLOWED_TABLE = "transactions"
 ALLOWED_COLUMNS = {"id","ts","amount","ccy","counterparty","book"}
@@ -46,13 +50,14 @@ SQL: SELECT * FROM transactions WHERE ccy = 'USD' AND counterparty = 'Beta Bank'
 
 # ---------- LLM call ----------
 
-def llm_sql(user_query: str, model: str = "gpt-4o-mini", max_tokens: int = 200) -> str:
+@async_ttl_cache()  # temperature=0.2 is near-deterministic, so reuse answers
+async def allm_sql(user_query: str, model: str = "gpt-4o-mini", max_tokens: int = 200) -> str:
     """Ask the LLM for a SQL SELECT statement. Returns raw SQL string."""
     msgs = [
         {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user",   "content": user_query.strip()},
     ]
-    resp = client.chat.completions.create(
+    resp = await client.chat.completions.create(
         model=model,
         temperature=0.2,
         max_tokens=max_tokens,
@@ -66,88 +71,99 @@ def llm_sql(user_query: str, model: str = "gpt-4o-mini", max_tokens: int = 200)
     return sql
 
 # ---------- Guardrails ----------
-
-DDL_DML_PATTERN = re.compile(
-    r"\b(DROP|DELETE|UPDATE|INSERT|ALTER|CREATE|TRUNCATE|ATTACH|PRAGMA|VACUUM)\b",
-    re.IGNORECASE
-)
-
-IDENT_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
-
-AGG_FUNCS = {"COUNT","SUM","AVG","MIN","MAX"}
-
-def is_select(sql: str) -> bool:
-    return bool(re.match(r"^\s*SELECT\b", sql, flags=re.IGNORECASE))
-
-# --- replace mentions_only_allowed_identifiers() with these helpers ---
+# All checks walk one sqlglot parse tree, so string literals such as
+# WHERE counterparty = 'Drop Ltd' are never mistaken for keywords.
 
 TABLE_NAME = ALLOWED_TABLE.lower()
 ALLOWED_COLS_LC = {c.lower() for c in ALLOWED_COLUMNS}
 
-TABLE_FROM_PATTERN = re.compile(r"\bFROM\s+([A-Za-z_][A-Za-z0-9_]*)", re.IGNORECASE)
-TABLE_JOIN_PATTERN = re.compile(r"\bJOIN\s+([A-Za-z_][A-Za-z0-9_]*)", re.IGNORECASE)
-DOT_COL_PATTERN   = re.compile(r"\b([A-Za-z_][A-Za-z0-9_]*)\.([A-Za-z_][A-Za-z0-9_]*)")
+# Statement types that must never run (names vary across sqlglot versions)
+UNSAFE_NODES = tuple(
+    getattr(exp, name) for name in
+    ("Drop", "Delete", "Update", "Insert", "Create", "Alter", "AlterTable",
+     "TruncateTable", "Pragma", "Attach", "Command")
+    if hasattr(exp, name)
+)
 
-def only_allowed_tables(sql: str) -> bool:
-    """Ensure FROM/JOIN tables are exactly 'transactions'."""
-    for m in TABLE_FROM_PATTERN.finditer(sql):
-        if m.group(1).lower() != TABLE_NAME:
-            return False
-    for m in TABLE_JOIN_PATTERN.finditer(sql):
-        if m.group(1).lower() != TABLE_NAME:
+def parse_sql(sql: str) -> Optional[exp.Expression]:
+    """Parse exactly one SQLite statement; None if unparsable or several."""
+    try:
+        stmts = [s for s in sqlglot.parse(sql, read="sqlite") if s is not None]
+    except sqlglot.errors.SqlglotError:  # ParseError, TokenError (e.g. truncated literal), ...
+        return None
+    return stmts[0] if len(stmts) == 1 else None
+
+def is_select(tree: exp.Expression) -> bool:
+    return isinstance(tree, (exp.Select, exp.Union, exp.Except, exp.Intersect))
+
+def is_unsafe(tree: exp.Expression) -> bool:
+    return isinstance(tree, UNSAFE_NODES) or tree.find(*UNSAFE_NODES) is not None
+
+def only_allowed_tables(tree: exp.Expression) -> bool:
+    """Ensure every referenced table is exactly 'transactions'."""
+    tables = list(tree.find_all(exp.Table))
+    for t in tables:
+        if t.db or t.name.lower() != TABLE_NAME:
             return False
     # Require at least one FROM transactions
-    return bool(TABLE_FROM_PATTERN.search(sql))
+    return bool(tables)
 
-def dot_columns_are_allowed(sql: str) -> bool:
+def dot_columns_are_allowed(tree: exp.Expression) -> bool:
     """If dot notation is used, ensure table is 'transactions' and column is allowed."""
-    for m in DOT_COL_PATTERN.finditer(sql):
-        t, c = m.group(1).lower(), m.group(2).lower()
-        if t != TABLE_NAME or c not in ALLOWED_COLS_LC:
+    for c in tree.find_all(exp.Column):
+        if not c.table:
+            continue
+        if c.table.lower() != TABLE_NAME:
+            return False
+        if not isinstance(c.this, exp.Star) and c.name.lower() not in ALLOWED_COLS_LC:
             return False
     return True
 
+def has_limit(tree: exp.Expression) -> bool:
+    return tree.args.get("limit") is not None
 
+def is_aggregate(tree: exp.Expression) -> bool:
+    return tree.find(exp.AggFunc) is not None
 
-def has_limit(sql: str) -> bool:
-    return bool(re.search(r"\bLIMIT\s+\d+\b", sql, flags=re.IGNORECASE))
-
-def is_aggregate(sql: str) -> bool:
-    return any(func in sql.upper() for func in AGG_FUNCS)
-
-def add_default_limit(sql: str, default_limit: int = 100) -> str:
-    if not has_limit(sql) and not is_aggregate(sql):
-        return sql.rstrip(";") + f" LIMIT {default_limit};"
-    return sql
+def add_default_limit(tree: exp.Expression, default_limit: int = 100) -> exp.Expression:
+    if not has_limit(tree) and not is_aggregate(tree):
+        return tree.limit(default_limit)
+    return tree
 
 def sanitize_sql(sql: str) -> Tuple[bool, str]:
-    sql_clean = sql.strip().rstrip(";") + ";"
+    tree = parse_sql(sql)
 
-    if not is_select(sql_clean):
-        return False, "Only SELECT queries are allowed."
-    if DDL_DML_PATTERN.search(sql_clean):
+    if tree is None:
+        return False, "Only a single, valid SELECT statement is allowed."
+    if is_unsafe(tree):
         return False, "Destructive or unsafe SQL detected (DDL/DML not allowed)."
-    if not only_allowed_tables(sql_clean):
+    if not is_select(tree):
+        return False, "Only SELECT queries are allowed."
+    if not only_allowed_tables(tree):
         return False, "Query references unknown or disallowed tables."
-    if not dot_columns_are_allowed(sql_clean):
+    if not dot_columns_are_allowed(tree):
         return False, "Query references unknown columns via dot notation."
 
-    sql_final = add_default_limit(sql_clean)
+    sql_final = add_default_limit(tree).sql(dialect="sqlite") + ";"
     return True, sql_final
 
 
 # ---------- Execution ----------
 
+@functools.lru_cache(maxsize=1)
+def _con(db_path: str) -> sqlite3.Connection:
+    """One shared read-only connection per process; the app never writes."""
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    con = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    con.execute("PRAGMA mmap_size=268435456")  # 256 MB, per-connection
+    return con
+
 def execute_sql(db_path: str, sql: str, limit_rows: int = 100) -> pd.DataFrame:
-    con = sqlite3.connect(db_path)
-    try:
-        df = pd.read_sql_query(sql, con)
-        # Safety cap in case LIMIT missing (extra guard)
-        if len(df) > limit_rows:
-            df = df.head(limit_rows)
-        return df
-    finally:
-        con.close()
+    df = pd.read_sql_query(sql, _con(db_path))
+    # Safety cap in case LIMIT missing (extra guard)
+    if len(df) > limit_rows:
+        df = df.head(limit_rows)
+    return df
 
 # ---------- Main entrypoint for the app ----------
 
@@ -162,7 +178,9 @@ def nl2sql_run(user_query: str,
         return None, None, f"Database not found at {db_path}. Run data/make_transactions_db.py first."
 
     try:
-        raw_sql = llm_sql(user_query, model=model)
+        # Only the LLM call runs on the shared event loop; parsing and the
+        # blocking SQLite/pandas work stay on the caller's (script) thread
+        raw_sql = run_async(allm_sql(user_query, model=model))
     except Exception as e:
         return None, None, f"LLM error: {e}"
 
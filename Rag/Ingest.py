@@ -1,10 +1,23 @@
-import os, pickle
+import os, math, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+import orjson
+import zstandard as zstd
 import fitz  # PyMuPDF
-from sentence_transformers import SentenceTransformer
+# faiss, torch and sentence_transformers are imported inside the functions that
+# need them: PDF workers are spawned (see load_pdfs_to_chunks), re-import this
+# module from scratch, and only need PyMuPDF.
 
 EMB_MODEL_NAME = "all-MiniLM-L6-v2"
-INDEX_PATH = "Rag/index.pkl"
+INDEX_PATH = "Rag/index_meta.json.zst"
+EMB_PATH = "Rag/index_emb.npy"
+FAISS_PATH = "Rag/index.faiss"
+
+# Above this many chunks, switch from exact search to an IVF index
+IVF_MIN_CHUNKS = 10_000
+IVF_NPROBE = 32
+ZSTD_LEVEL = 3
+ENCODE_BATCH_SIZE = 128
 
 def chunk_text(text: str, words_per_chunk=300, overlap=50):
     words = text.split()
@@ -16,17 +29,16 @@ def chunk_text(text: str, words_per_chunk=300, overlap=50):
             chunks.append(chunk)
     return chunks
 
-def load_pdfs_to_chunks(folder="Data/Filings"):
+def _process_one_pdf(path: str):
+    """Chunk one PDF. Top-level so it can run in a worker process."""
+    fname = os.path.basename(path)
     docs = []
-    for fname in os.listdir(folder):
-        if not fname.lower().endswith(".pdf"):
-            continue
-        path = os.path.join(folder, fname)
+    try:
+        doc = fitz.open(path)
         try:
-            doc = fitz.open(path)
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                text = page.get_text("text")
+            for page_num, page in enumerate(doc):
+                # b[4] is the block text, b[6] == 0 marks text (not image) blocks
+                text = "\n".join(b[4] for b in page.get_text("blocks") if b[6] == 0)
                 if not text:
                     continue
                 for chunk in chunk_text(text, 300, 60):
@@ -35,28 +47,74 @@ def load_pdfs_to_chunks(folder="Data/Filings"):
                         "source": fname,
                         "page": page_num + 1
                     })
-        except Exception as e:
-            print(f"[WARN] Failed to read {fname}: {e}")
+        finally:
+            doc.close()
+    except Exception as e:
+        print(f"[WARN] Failed to read {fname}: {e}")
     return docs
 
-def build_index(folder="Data/Filings", index_path=INDEX_PATH):
-    model = SentenceTransformer(EMB_MODEL_NAME)
+def load_pdfs_to_chunks(folder="Data/Filings"):
+    paths = [os.path.join(folder, fname) for fname in sorted(os.listdir(folder))
+             if fname.lower().endswith(".pdf")]
+    docs = []
+    if not paths:
+        return docs
+    # PDFs parse independently, so spread them across processes. Always spawn:
+    # the caller is usually the multi-threaded Streamlit process, which may
+    # already hold torch/OpenMP/CUDA state that a forked child would inherit.
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1), mp_context=ctx) as ex:
+        for result in ex.map(_process_one_pdf, paths):
+            docs.extend(result)
+    return docs
+
+def build_faiss_index(embs: np.ndarray):
+    """
+    Inner-product FAISS index over L2-normalized embeddings (IP == cosine).
+    Vectors are stored as fp16 to halve the bytes each search streams.
+    Flat scan for small corpora, IVF for large ones.
+    """
+    import faiss
+    n, d = embs.shape
+    qtype = faiss.ScalarQuantizer.QT_fp16
+    if n < IVF_MIN_CHUNKS:
+        index = faiss.IndexScalarQuantizer(d, qtype, faiss.METRIC_INNER_PRODUCT)
+    else:
+        nlist = int(4 * math.sqrt(n))
+        quantizer = faiss.IndexFlatIP(d)
+        index = faiss.IndexIVFScalarQuantizer(quantizer, d, nlist, qtype, faiss.METRIC_INNER_PRODUCT)
+        index.nprobe = IVF_NPROBE
+    index.train(embs)
+    index.add(embs)
+    return index
+
+def build_index(folder="Data/Filings", index_path=INDEX_PATH, emb_path=EMB_PATH, faiss_path=FAISS_PATH):
+    # Parse before loading the model so the workers' startup does not compete
+    # with model initialisation for CPU and memory
     docs = load_pdfs_to_chunks(folder)
     if not docs:
         raise RuntimeError("No PDF chunks found. Add PDFs into data/filings and retry.")
+    import faiss, torch
+    from sentence_transformers import SentenceTransformer
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = SentenceTransformer(EMB_MODEL_NAME, device=device)
     texts = [d["text"] for d in docs]
-    embs = model.encode(texts, normalize_embeddings=True)
-    embs = np.asarray(embs, dtype=np.float32)
+    embs = model.encode(texts, batch_size=ENCODE_BATCH_SIZE, normalize_embeddings=True,
+                        convert_to_numpy=True, show_progress_bar=False)
+    embs = np.ascontiguousarray(embs, dtype=np.float32)
     meta = [{"source": d["source"], "page": d["page"]} for d in docs]
     payload = {
         "model_name": EMB_MODEL_NAME,
-        "embeddings": embs,
         "texts": texts,
         "meta": meta
     }
     os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    # Raw .npy so the retriever can memory-map it instead of reading it all in;
+    # fp16 halves the file, and recall loss is negligible on normalized MiniLM vectors
+    np.save(emb_path, embs.astype(np.float16))
     with open(index_path, "wb") as f:
-        pickle.dump(payload, f)
+        f.write(zstd.ZstdCompressor(level=ZSTD_LEVEL).compress(orjson.dumps(payload)))
+    faiss.write_index(build_faiss_index(embs), faiss_path)
     return index_path, len(texts)
 
 if __name__ == "__main__":
@@ -1,27 +1,77 @@
-import pickle
+import os, heapq
 import numpy as np
-from sentence_transformers import SentenceTransformer
+import orjson
+import zstandard as zstd
 
-def load_index(index_path="Rag/index.pkl"):
+try:
+    import faiss
+except ImportError:  # fall back to the NumPy scan below
+    faiss = None
+
+def load_index(index_path="Rag/index_meta.json.zst", emb_path="Rag/index_emb.npy",
+               faiss_path="Rag/index.faiss"):
     with open(index_path, "rb") as f:
-        return pickle.load(f)
+        idx = orjson.loads(zstd.ZstdDecompressor().decompress(f.read()))
+    # Memory-mapped: pages fault in lazily and are shared across workers
+    idx["embeddings"] = np.load(emb_path, mmap_mode="r")
+    if faiss is not None:
+        if os.path.exists(faiss_path):
+            idx["faiss"] = faiss.read_index(faiss_path)
+        else:
+            # No FAISS file next to the embeddings: build an exact index in memory
+            embs = np.ascontiguousarray(idx["embeddings"], dtype=np.float32)
+            index = faiss.IndexFlatIP(embs.shape[1])
+            index.add(embs)
+            idx["faiss"] = index
+    return idx
+
+SCAN_BLOCK_ROWS = 4096
 
-def cosine_topk(query: str, idx, k=3, min_score: float | None = None):
+def _topk_blocked(embs: np.ndarray, qv: np.ndarray, k: int):
     """
-    Return top-k results by cosine similarity.
-    If min_score is set, filter out results below this threshold.
+    Top-k (row, score) pairs, best first, for fp16 (or fp32) embeddings.
+    Each block is upcast, scored and reduced to its own top-k while still in
+    cache; only those candidates reach the heap, so the full similarity
+    vector is never materialized or sorted.
     """
-    model = SentenceTransformer(idx["model_name"])
-    qv = model.encode([query], normalize_embeddings=True)
-    qv = np.asarray(qv, dtype=np.float32)  # shape (1, d)
+    q = qv.ravel()
+    heap = []  # min-heap of (score, row), size <= k
+    for start in range(0, embs.shape[0], SCAN_BLOCK_ROWS):
+        sims = embs[start:start + SCAN_BLOCK_ROWS].astype(np.float32, copy=False) @ q
+        kb = min(k, sims.size)
+        for j in np.argpartition(-sims, kb - 1)[:kb]:
+            item = (float(sims[j]), start + int(j))
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+    return [(i, s) for s, i in sorted(heap, reverse=True)]
+
+def _search(idx, qv: np.ndarray, k: int):
+    """Yield (row, score) pairs for the top-k rows, best first."""
+    if k <= 0:
+        return
+    if idx.get("faiss") is not None:
+        D, I = idx["faiss"].search(qv, k)
+        for i, s in zip(I[0], D[0]):
+            if i >= 0:  # FAISS pads with -1 when fewer than k hits
+                yield int(i), float(s)
+        return
 
     # cosine similarity = dot product because vectors are L2-normalized
-    sims = (idx["embeddings"] @ qv.T).ravel()
+    yield from _topk_blocked(idx["embeddings"], qv, k)
+
+def cosine_topk(query_vec: np.ndarray, idx, k=3, min_score: float | None = None):
+    """
+    Return top-k results by cosine similarity.
+    query_vec is the L2-normalized query embedding, float32 of shape (1, d),
+    encoded with idx["model_name"] by the caller.
+    If min_score is set, filter out results below this threshold.
+    """
+    qv = np.ascontiguousarray(query_vec, dtype=np.float32).reshape(1, -1)
 
-    order = np.argsort(-sims)
     results = []
-    for i in order[:k]:
-        score = float(sims[i])
+    for i, score in _search(idx, qv, k):
         if (min_score is not None) and (score < min_score):
             continue
         results.append({
@@ -31,4 +81,3 @@ def cosine_topk(query: str, idx, k=3, min_score: float | None = None):
             "page": idx["meta"][i]["page"]
         })
     return results
-
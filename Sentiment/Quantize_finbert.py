@@ -0,0 +1,23 @@
+#Run once from the repo root: python -m Sentiment.Quantize_finbert
+
+import os, tempfile
+from optimum.onnxruntime import ORTModelForSequenceClassification
+from onnxruntime.quantization import quantize_dynamic, QuantType
+from transformers import AutoTokenizer
+
+from Sentiment.Zero_shot import FINBERT_MODEL, FINBERT_INT8_DIR
+
+def main(out_dir: str = FINBERT_INT8_DIR):
+    os.makedirs(out_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        # FP32 ONNX export, then dynamic int8 weights (VNNI GEMMs on CPU)
+        ort_model = ORTModelForSequenceClassification.from_pretrained(FINBERT_MODEL, export=True)
+        ort_model.save_pretrained(tmp)
+        quantize_dynamic(os.path.join(tmp, "model.onnx"), os.path.join(out_dir, "model.onnx"),
+                         weight_type=QuantType.QInt8)
+    ort_model.config.save_pretrained(out_dir)
+    AutoTokenizer.from_pretrained(FINBERT_MODEL, use_fast=True).save_pretrained(out_dir)
+    print(f"Saved int8 FinBERT to {out_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,35 @@
-from transformers import pipeline
+import os
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
+
+try:
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+except ImportError:  # int8 ONNX path is optional
+    ORTModelForSequenceClassification = None
+
+FINBERT_MODEL = "ProsusAI/finbert"
+# Written by Sentiment/Quantize_finbert.py
+FINBERT_INT8_DIR = os.path.join("Sentiment", "finbert-int8")
+BATCH_SIZE = 16
 
 # Load once; Streamlit will cache at call site
 def load_finbert_pipeline():
-    return pipeline("text-classification", model="ProsusAI/finbert", return_all_scores=False)
+    torch.set_num_threads(os.cpu_count() or 1)
+    if (ORTModelForSequenceClassification is not None and not torch.cuda.is_available()
+            and os.path.isdir(FINBERT_INT8_DIR)):
+        # int8 ONNX Runtime model: faster on CPU and ~4x smaller than FP32
+        tok = AutoTokenizer.from_pretrained(FINBERT_INT8_DIR, use_fast=True)
+        mdl = ORTModelForSequenceClassification.from_pretrained(FINBERT_INT8_DIR)
+        return pipeline("text-classification", model=mdl, tokenizer=tok, batch_size=BATCH_SIZE)
+    tok = AutoTokenizer.from_pretrained(FINBERT_MODEL, use_fast=True)  # Rust tokenizer
+    mdl = AutoModelForSequenceClassification.from_pretrained(FINBERT_MODEL)
+    return pipeline("text-classification", model=mdl, tokenizer=tok,
+                    device=0 if torch.cuda.is_available() else -1, batch_size=BATCH_SIZE)
 
 def classify_sentiment(nlp, text: str):
     out = nlp(text)[0]  # {'label': 'positive'/'negative'/'neutral', 'score': ...}
     return out["label"], float(out["score"])
+
+def classify_sentiments(nlp, texts: list[str]):
+    """Classify many texts in one batched pipeline call; returns [(label, score), ...]."""
+    return [(out["label"], float(out["score"])) for out in nlp(texts)]
@@ -0,0 +1,35 @@
+import time, functools
+
+TTL_SECONDS = 3600
+MAX_ENTRIES = 512
+
+# Module-level so entries survive Streamlit re-executing App.py on every rerun.
+# Only touched from the shared OpenAI event loop (Config.run_async), so no lock.
+_STORE: dict[tuple, tuple[float, object]] = {}
+
+def _evict(now: float):
+    for key in [k for k, (expires, _) in _STORE.items() if expires <= now]:
+        del _STORE[key]
+    while len(_STORE) >= MAX_ENTRIES:
+        _STORE.pop(next(iter(_STORE)))  # oldest insert first
+
+def async_ttl_cache(ttl: float = TTL_SECONDS):
+    """
+    Memoize an async function on its (hashable) arguments for `ttl` seconds.
+    Exceptions are not cached.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            key = (fn.__module__, fn.__qualname__, args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            hit = _STORE.get(key)
+            if hit is not None and hit[0] > now:
+                return hit[1]
+            value = await fn(*args, **kwargs)
+            if len(_STORE) >= MAX_ENTRIES:
+                _evict(now)
+            _STORE[key] = (now + ttl, value)
+            return value
+        return wrapper
+    return decorator